@@ -21,6 +21,11 @@ try:
         sys.modules[module] = Mock()
         print("Mocked '{}' module".format(module))
 
+    # Keep the code emitter decorators transparent so autodoc still
+    # sees the original functions and their docstrings
+    sys.modules["micropython"].native = lambda func: func
+    sys.modules["micropython"].viper = lambda func: func
+
     import micropython_mma8451
 except ImportError:
     raise SystemExit("micropython_mma8451 has to be importable")
@@ -0,0 +1,23 @@
+# SPDX-FileCopyrightText: Copyright (c) 2023 Jose D. Montoya
+#
+# SPDX-License-Identifier: MIT
+
+from machine import Pin, I2C
+from micropython_mma8451 import mma8451
+
+# Besides the I2C connection, this example needs the sensor INT1 pin
+# wired to GP4
+i2c = I2C(1, sda=Pin(2), scl=Pin(3), freq=400_000)  # Correct I2C pins for RP2040
+mma = mma8451.MMA8451(i2c)
+int_pin = Pin(4, Pin.IN)
+
+# A new sample every 640 ms
+mma.data_rate = mma8451.DATARATE_1_56HZ
+
+FMT = "Acceleration: X={:0.1f}m/s^2 y={:0.1f}m/s^2 z={:0.1f}m/s^2".format
+
+while True:
+    mma.wait_for_data(int_pin)
+    accx, accy, accz = mma.acceleration
+    print(FMT(accx, accy, accz))
+    print()
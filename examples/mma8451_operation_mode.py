@@ -2,13 +2,15 @@
 #
 # SPDX-License-Identifier: MIT
 
-import time
+from time import sleep
 from machine import Pin, I2C
 from micropython_mma8451 import mma8451
 
-i2c = I2C(1, sda=Pin(2), scl=Pin(3))  # Correct I2C pins for RP2040
+i2c = I2C(1, sda=Pin(2), scl=Pin(3), freq=400_000)  # Correct I2C pins for RP2040
 mma = mma8451.MMA8451(i2c)
 
+FMT = "Acceleration: X={:0.1f}m/s^2 y={:0.1f}m/s^2 z={:0.1f}m/s^2".format
+
 mma.operation_mode = mma8451.STANDBY_MODE
 
 while True:
@@ -16,9 +18,7 @@ while True:
         print("Current Operation mode setting: ", mma.operation_mode)
         for _ in range(10):
             accx, accy, accz = mma.acceleration
-            print(
-                f"Acceleration: X={accx:0.1f}m/s^2 y={accy:0.1f}m/s^2 z={accz:0.1f}m/s^2"
-            )
+            print(FMT(accx, accy, accz))
             print()
-            time.sleep(0.5)
+            sleep(0.5)
         mma.operation_mode = operation_mode
@@ -2,15 +2,21 @@
 #
 # SPDX-License-Identifier: MIT
 
-import time
+from time import sleep
+from array import array
 from machine import Pin, I2C
 from micropython_mma8451 import mma8451
 
-i2c = I2C(1, sda=Pin(2), scl=Pin(3))  # Correct I2C pins for RP2040
+i2c = I2C(1, sda=Pin(2), scl=Pin(3), freq=400_000)  # Correct I2C pins for RP2040
 mma = mma8451.MMA8451(i2c)
 
+FMT = "Acceleration: X={:0.1f}m/s^2 y={:0.1f}m/s^2 z={:0.1f}m/s^2".format
+
+# Allocated once, read_accel_into fills it with Q16.16 fixed point m/s^2
+out = array("i", (0, 0, 0))
+
 while True:
-    x, y, z = mma.acceleration
-    print(f"Acceleration: X={x:0.1f}m/s^2 y={y:0.1f}m/s^2 z={z:0.1f}m/s^2")
+    mma.read_accel_into(out)
+    print(FMT(out[0] / 65536, out[1] / 65536, out[2] / 65536))
     print()
-    time.sleep(0.5)
+    sleep(0.5)
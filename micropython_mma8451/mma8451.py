@@ -13,14 +13,23 @@ MicroPython module for the MMA8451 3 axis accelerometer
 
 """
 
+from array import array
+from machine import idle
+import micropython
 from micropython import const
 from micropython_mma8451.i2c_helpers import CBits, RegisterStruct
 
 try:
-    from typing import Tuple
+    from typing import Optional, Tuple
 except ImportError:
     pass
 
+try:
+    _frozenset = frozenset
+except NameError:
+    # Ports built without frozenset support fall back to a tuple scan
+    _frozenset = tuple
+
 
 __version__ = "0.0.0+auto.0"
 __repo__ = "https://github.com/jposada202020/MicroPython_MMA8451.git"
@@ -30,19 +39,36 @@ _REG_WHOAMI = const(0x0D)
 _DATA = const(0x01)
 _XYZ_DATA_CFG = const(0x0E)
 _CTRL_REG1 = const(0x2A)
-_HP_FILTER_CUTOFF = const(0x2F)
+_CTRL_REG4 = const(0x2D)
+_CTRL_REG5 = const(0x2E)
+_HP_FILTER_CUTOFF = const(0x0F)
+
+_ACTIVE_MASK = const(0b00000001)
+_DATA_RATE_MASK = const(0b00111000)
+_SCALE_RANGE_MASK = const(0b00000011)
+_HPF_MASK = const(0b00010000)
+_HPF_CUTOFF_MASK = const(0b00000011)
+_DRDY_MASK = const(0b00000001)
 
 _GRAVITY = 9.80665
+_Q16_SCALE = 1 / 65536
 
 STANDBY_MODE = const(0b0)
 ACTIVE_MODE = const(0b1)
 operation_mode_values = (STANDBY_MODE, ACTIVE_MODE)
+_operation_mode_set = _frozenset(operation_mode_values)
+_OPERATION_MODE_NAMES = ("STANDBY_MODE", "ACTIVE_MODE")
 
 RANGE_2G = const(0b00)
 RANGE_4G = const(0b01)
 RANGE_8G = const(0b10)
 scale_range_values = (RANGE_2G, RANGE_4G, RANGE_8G)
-scale_conversion = {RANGE_2G: 4096.0, RANGE_4G: 2048.0, RANGE_8G: 1024.0}
+_scale_range_set = _frozenset(scale_range_values)
+_SCALE_RANGE_NAMES = ("RANGE_2G", "RANGE_4G", "RANGE_8G")
+# Counts per g, indexed by the RANGE_* setting
+scale_conversion = (4096.0, 2048.0, 1024.0)
+# m/s^2 per count in Q8.24 for each range, computed once at import
+_Q_FACTORS = tuple(round(_GRAVITY * (1 << 24) / counts) for counts in scale_conversion)
 
 DATARATE_800HZ = const(0b000)
 DATARATE_400HZ = const(0b001)
@@ -62,26 +88,88 @@ data_rate_values = (
     DATARATE_6_25HZ,
     DATARATE_1_56HZ,
 )
+_data_rate_set = _frozenset(data_rate_values)
+_DATA_RATE_NAMES = (
+    "DATARATE_800HZ",
+    "DATARATE_400HZ",
+    "DATARATE_200HZ",
+    "DATARATE_100HZ",
+    "DATARATE_50HZ",
+    "DATARATE_12_5HZ",
+    "DATARATE_6_25HZ",
+    "DATARATE_1_56HZ",
+)
 
 HPF_DISABLED = const(0b0)
 HPF_ENABLED = const(0b1)
 high_pass_filter_values = (HPF_DISABLED, HPF_ENABLED)
+_high_pass_filter_set = _frozenset(high_pass_filter_values)
+_HPF_NAMES = ("HPF_DISABLED", "HPF_ENABLED")
 
 CUTOFF_16HZ = const(0b00)
 CUTOFF_8HZ = const(0b01)
 CUTOFF_4HZ = const(0b10)
 CUTOFF_2HZ = const(0b11)
 high_pass_filter_cutoff_values = (CUTOFF_16HZ, CUTOFF_8HZ, CUTOFF_4HZ, CUTOFF_2HZ)
+_high_pass_filter_cutoff_set = _frozenset(high_pass_filter_cutoff_values)
+_HPF_CUTOFF_NAMES = ("CUTOFF_16HZ", "CUTOFF_8HZ", "CUTOFF_4HZ", "CUTOFF_2HZ")
+
+
+try:
+    # Optional native module built from natmod/, same interface as the
+    # viper implementation below. An .mpy built for another architecture
+    # raises ValueError instead of ImportError
+    from mma8451_kernel import scale_q16 as _scale_q16
+except (ImportError, ValueError):
+
+    @micropython.viper
+    def _scale_q16(buf, factor: int, out):
+        # buf holds the big-endian 14-bit left aligned samples and factor is the
+        # m/s^2 per count in Q8.24, out receives the Q16.16 m/s^2 results as
+        # 32-bit integers
+        data = ptr8(buf)  # pylint: disable=undefined-variable
+        result = ptr32(out)  # pylint: disable=undefined-variable
+        # Branchless sign extension of the 16-bit words, then drop the two
+        # unused low bits
+        x = ((int((data[0] << 8) | data[1]) ^ 0x8000) - 0x8000) >> 2
+        y = ((int((data[2] << 8) | data[3]) ^ 0x8000) - 0x8000) >> 2
+        z = ((int((data[4] << 8) | data[5]) ^ 0x8000) - 0x8000) >> 2
+
+        result[0] = (x * factor) >> 8
+        result[1] = (y * factor) >> 8
+        result[2] = (z * factor) >> 8
+
+
+def _pending_setting(value, valid, cached, name):
+    # Validate a configure() argument, None means there is nothing to write
+    if value is None or value == cached:
+        return None
+    if value not in valid:
+        raise ValueError(f"Value must be a valid {name} setting")
+    return value
 
 
 class MMA8451:
     """Driver for the MMA8451 Sensor connected over I2C.
 
-    :param ~machine.I2C i2c: The I2C bus the MMA8451 is connected to.
+    :param ~machine.I2C i2c: The I2C bus the MMA8451 is connected to. Use a bus
+     frequency of at least 400 kHz (Fast mode), some ports default to 100 kHz,
+     which takes about four times longer per sample read and limits the
+     usable data rate.
     :param int address: The I2C device address. Defaults to :const:`0x1D`
+    :param bool check_id: Verify the sensor WHO_AM_I register. Set to :const:`False`
+     to save a bus transaction when the sensor is known to be present, for
+     instance when recreating the object after waking up. Defaults to :const:`True`
+    :param int scale_range: Scale range written to the sensor at start up. Pass the
+     range in use when recreating the object, as it is always written.
+     Defaults to :const:`RANGE_2G`
 
     :raises RuntimeError: if the sensor is not found
 
+    The sensor is put in active mode with the given ``scale_range`` when the
+    object is created. Data rate and high pass filter settings are left as
+    they are.
+
     **Quickstart: Importing and using the device**
 
     Here is an example of using the :class:`MMA8451` class.
@@ -96,7 +184,7 @@ class MMA8451:
 
     .. code-block:: python
 
-        i2c = I2C(1, sda=Pin(2), scl=Pin(3))
+        i2c = I2C(1, sda=Pin(2), scl=Pin(3), freq=400_000)
         mma8451 = mma8451.MMA8451(i2c)
 
     Now you have access to the attributes
@@ -105,41 +193,147 @@ class MMA8451:
 
         accx, accy, accz = mma8451.acceleration
 
+    or, without floating point math
+
+    .. code-block:: python
+
+        accx, accy, accz = mma8451.acceleration_fixed
+
     """
 
     _device_id = RegisterStruct(_REG_WHOAMI, "B")
-    _raw_data = RegisterStruct(_DATA, ">hhh")
     _operation_mode = CBits(1, _CTRL_REG1, 0)
     _scale_range = CBits(2, _XYZ_DATA_CFG, 0)
-    _data_rate = CBits(2, _CTRL_REG1, 4)
+    _data_rate = CBits(3, _CTRL_REG1, 3)
 
     _high_pass_filter = CBits(1, _XYZ_DATA_CFG, 4)
     _high_pass_filter_cutoff = CBits(2, _HP_FILTER_CUTOFF, 0)
 
-    def __init__(self, i2c, address: int = 0x1D) -> None:
+    def __init__(
+        self,
+        i2c,
+        address: int = 0x1D,
+        check_id: bool = True,
+        scale_range: int = RANGE_2G,
+    ) -> None:
         self._i2c = i2c
         self._address = address
+        self._buffer = bytearray(6)
+        self._readinto = i2c.readfrom_mem_into
+        self._fixed = array("i", (0, 0, 0))
 
-        if self._device_id != 0x1A:
+        if scale_range not in _scale_range_set:
+            raise ValueError("Value must be a valid scale_range setting")
+        if check_id and self._device_id != 0x1A:
             raise RuntimeError("Failed to find MMA8451")
 
-        self._operation_mode = ACTIVE_MODE
-        self._scale_range_cached = self._scale_range
+        # Start from a known scale range so the cached value never needs
+        # to be read back from the sensor
+        self._update_in_standby(_XYZ_DATA_CFG, _SCALE_RANGE_MASK, scale_range)
+        self._cache_scale_range(scale_range)
+        # Unknown until first written, so the first write always goes through
+        self._data_rate_cached = None
+        self._high_pass_filter_cached = None
+        self._high_pass_filter_cutoff_cached = None
+        self._data_ready_enabled = False
+
+    def _cache_scale_range(self, value: int) -> None:
+        self._scale_range_cached = value
+        self._q_factor = _Q_FACTORS[value]
+
+    def _read_register(self, register: int) -> int:
+        return self._i2c.readfrom_mem(self._address, register, 1)[0]
+
+    def _write_register(self, register: int, value: int) -> None:
+        self._i2c.writeto_mem(self._address, register, bytes((value,)))
+
+    def _update_register(self, register: int, mask: int, value: int) -> None:
+        reg = self._read_register(register)
+        self._write_register(register, (reg & ~mask) | (value & mask))
+
+    def _update_in_standby(self, register: int, mask: int, value: int) -> None:
+        # Configuration registers can only be written in standby mode, CTRL_REG1
+        # is read once and written back around the register update
+        ctrl = self._read_register(_CTRL_REG1)
+        self._write_register(_CTRL_REG1, ctrl & ~_ACTIVE_MASK)
+        self._update_register(register, mask, value)
+        self._write_register(_CTRL_REG1, ctrl | ACTIVE_MODE)
 
     @property
+    @micropython.native
     def acceleration(self) -> Tuple[float, float, float]:
         """
         Acceleration measured by the sensor in :math:`m/s^2`.
         """
 
-        x, y, z = self._raw_data
-        x >>= 2
-        y >>= 2
-        z >>= 2
+        self._readinto(self._address, _DATA, self._buffer)
+        fixed = self._fixed
+        _scale_q16(self._buffer, self._q_factor, fixed)
+
+        return fixed[0] * _Q16_SCALE, fixed[1] * _Q16_SCALE, fixed[2] * _Q16_SCALE
+
+    @property
+    @micropython.native
+    def acceleration_fixed(self) -> Tuple[int, int, int]:
+        """
+        Acceleration measured by the sensor in Q16.16 fixed point :math:`m/s^2`.
+        Divide each value by :const:`65536` to get :math:`m/s^2`. Useful on
+        boards without a hardware FPU, as no floating point math is involved.
+        """
+
+        self._readinto(self._address, _DATA, self._buffer)
+        fixed = self._fixed
+        _scale_q16(self._buffer, self._q_factor, fixed)
+
+        return fixed[0], fixed[1], fixed[2]
+
+    def wait_for_data(self, int_pin) -> None:
+        """
+        Wait until the sensor has a new sample available, idling the CPU
+        instead of sleeping for a fixed time. ``int_pin`` is a
+        :class:`machine.Pin` input connected to the sensor INT1 pin.
+
+        The data ready interrupt is enabled and routed to INT1 on the first
+        call. INT1 is active low and goes back high once the sample is read,
+        so read the acceleration after each call.
+
+        .. code-block:: python
+
+            int_pin = Pin(4, Pin.IN)
+
+            while True:
+                mma8451.wait_for_data(int_pin)
+                accx, accy, accz = mma8451.acceleration
+        """
+        if not self._data_ready_enabled:
+            ctrl = self._read_register(_CTRL_REG1)
+            self._write_register(_CTRL_REG1, ctrl & ~_ACTIVE_MASK)
+            self._update_register(_CTRL_REG4, _DRDY_MASK, _DRDY_MASK)
+            self._update_register(_CTRL_REG5, _DRDY_MASK, _DRDY_MASK)
+            self._write_register(_CTRL_REG1, ctrl | ACTIVE_MODE)
+            self._data_ready_enabled = True
+
+        while int_pin.value():
+            idle()
+
+    @micropython.native
+    def read_accel_into(self, out) -> None:
+        """
+        Read the acceleration measured by the sensor into ``out``, a caller
+        owned ``array("i", (0, 0, 0))``, as Q16.16 fixed point :math:`m/s^2`.
+        Divide each value by :const:`65536` to get :math:`m/s^2`. The sample
+        is written in place, so repeated reads do not allocate any memory.
+
+        .. code-block:: python
+
+            from array import array
 
-        divisor = scale_conversion[self._scale_range_cached]
+            out = array("i", (0, 0, 0))
+            mma8451.read_accel_into(out)
+        """
 
-        return x / divisor * _GRAVITY, y / divisor * _GRAVITY, z / divisor * _GRAVITY
+        self._readinto(self._address, _DATA, self._buffer)
+        _scale_q16(self._buffer, self._q_factor, out)
 
     @property
     def operation_mode(self) -> str:
@@ -154,12 +348,11 @@ class MMA8451:
         | :py:const:`mma8451.ACTIVE_MODE`  | :py:const:`0b1` |
         +----------------------------------+-----------------+
         """
-        values = ("STANDBY_MODE", "ACTIVE_MODE")
-        return values[self._operation_mode]
+        return _OPERATION_MODE_NAMES[self._operation_mode]
 
     @operation_mode.setter
     def operation_mode(self, value: int) -> None:
-        if value not in operation_mode_values:
+        if value not in _operation_mode_set:
             raise ValueError("Value must be a valid operation_mode setting")
         self._operation_mode = value
 
@@ -178,17 +371,16 @@ class MMA8451:
         | :py:const:`mma8451.RANGE_8G` | :py:const:`0b10` |
         +------------------------------+------------------+
         """
-        values = ("RANGE_2G", "RANGE_4G", "RANGE_8G")
-        return values[self._scale_range]
+        return _SCALE_RANGE_NAMES[self._scale_range]
 
     @scale_range.setter
     def scale_range(self, value: int) -> None:
-        if value not in scale_range_values:
+        if value not in _scale_range_set:
             raise ValueError("Value must be a valid scale_range setting")
-        self._operation_mode = STANDBY_MODE
-        self._scale_range = value
-        self._scale_range_cached = value
-        self._operation_mode = ACTIVE_MODE
+        if value == self._scale_range_cached:
+            return
+        self._update_in_standby(_XYZ_DATA_CFG, _SCALE_RANGE_MASK, value)
+        self._cache_scale_range(value)
 
     @property
     def data_rate(self) -> str:
@@ -215,25 +407,22 @@ class MMA8451:
         | :py:const:`mma8451.DATARATE_1_56HZ` | :py:const:`0b111` |
         +-------------------------------------+-------------------+
         """
-        values = (
-            "DATARATE_800HZ",
-            "DATARATE_400HZ",
-            "DATARATE_200HZ",
-            "DATARATE_100HZ",
-            "DATARATE_50HZ",
-            "DATARATE_12_5HZ",
-            "DATARATE_6_25HZ",
-            "DATARATE_1_56HZ",
-        )
-        return values[self._data_rate]
+        return _DATA_RATE_NAMES[self._data_rate]
 
     @data_rate.setter
     def data_rate(self, value: int) -> None:
-        if value not in data_rate_values:
+        if value not in _data_rate_set:
             raise ValueError("Value must be a valid data_rate setting")
-        self._operation_mode = STANDBY_MODE
-        self._data_rate = value
-        self._operation_mode = ACTIVE_MODE
+        if value == self._data_rate_cached:
+            return
+        # Data rate and active bit share CTRL_REG1, so a single read is enough.
+        # The rate may only change in standby: enter standby with the old rate,
+        # then write the new rate together with the active bit
+        ctrl = self._read_register(_CTRL_REG1) & ~_ACTIVE_MASK
+        self._write_register(_CTRL_REG1, ctrl)
+        ctrl = (ctrl & ~_DATA_RATE_MASK) | (value << 3)
+        self._write_register(_CTRL_REG1, ctrl | ACTIVE_MODE)
+        self._data_rate_cached = value
 
     @property
     def high_pass_filter(self) -> str:
@@ -248,16 +437,16 @@ class MMA8451:
         | :py:const:`mma8451.HPF_ENABLED`  | :py:const:`0b1` |
         +----------------------------------+-----------------+
         """
-        values = ("HPF_DISABLED", "HPF_ENABLED")
-        return values[self._high_pass_filter]
+        return _HPF_NAMES[self._high_pass_filter]
 
     @high_pass_filter.setter
     def high_pass_filter(self, value: int) -> None:
-        if value not in high_pass_filter_values:
+        if value not in _high_pass_filter_set:
             raise ValueError("Value must be a valid high_pass_filter setting")
-        self._operation_mode = STANDBY_MODE
-        self._high_pass_filter = value
-        self._operation_mode = ACTIVE_MODE
+        if value == self._high_pass_filter_cached:
+            return
+        self._update_in_standby(_XYZ_DATA_CFG, _HPF_MASK, value << 4)
+        self._high_pass_filter_cached = value
 
     @property
     def high_pass_filter_cutoff(self) -> str:
@@ -279,13 +468,91 @@ class MMA8451:
         | :py:const:`mma8451.CUTOFF_2HZ`  | :py:const:`0b11` |
         +---------------------------------+------------------+
         """
-        values = ("CUTOFF_16HZ", "CUTOFF_8HZ", "CUTOFF_4HZ", "CUTOFF_2HZ")
-        return values[self._high_pass_filter_cutoff]
+        return _HPF_CUTOFF_NAMES[self._high_pass_filter_cutoff]
 
     @high_pass_filter_cutoff.setter
     def high_pass_filter_cutoff(self, value: int) -> None:
-        if value not in high_pass_filter_cutoff_values:
+        if value not in _high_pass_filter_cutoff_set:
             raise ValueError("Value must be a valid high_pass_filter_cutoff setting")
-        self._operation_mode = STANDBY_MODE
-        self._high_pass_filter_cutoff = value
-        self._operation_mode = ACTIVE_MODE
+        if value == self._high_pass_filter_cutoff_cached:
+            return
+        self._update_in_standby(_HP_FILTER_CUTOFF, _HPF_CUTOFF_MASK, value)
+        self._high_pass_filter_cutoff_cached = value
+
+    def configure(
+        self,
+        scale_range: Optional[int] = None,
+        data_rate: Optional[int] = None,
+        high_pass_filter: Optional[int] = None,
+        high_pass_filter_cutoff: Optional[int] = None,
+    ) -> None:
+        """
+        Change several settings at once. The sensor goes to standby and back
+        to active mode only once, instead of once per setting, and settings
+        sharing a register are merged into a single write. Settings left as
+        :const:`None`, or already set to the requested value, are not changed.
+
+        .. code-block:: python
+
+            mma.configure(
+                scale_range=mma8451.RANGE_4G,
+                data_rate=mma8451.DATARATE_100HZ,
+                high_pass_filter=mma8451.HPF_ENABLED,
+            )
+        """
+        scale_range = _pending_setting(
+            scale_range, _scale_range_set, self._scale_range_cached, "scale_range"
+        )
+        data_rate = _pending_setting(
+            data_rate, _data_rate_set, self._data_rate_cached, "data_rate"
+        )
+        high_pass_filter = _pending_setting(
+            high_pass_filter,
+            _high_pass_filter_set,
+            self._high_pass_filter_cached,
+            "high_pass_filter",
+        )
+        high_pass_filter_cutoff = _pending_setting(
+            high_pass_filter_cutoff,
+            _high_pass_filter_cutoff_set,
+            self._high_pass_filter_cutoff_cached,
+            "high_pass_filter_cutoff",
+        )
+        if (
+            scale_range is None
+            and data_rate is None
+            and high_pass_filter is None
+            and high_pass_filter_cutoff is None
+        ):
+            return
+
+        ctrl = self._read_register(_CTRL_REG1) & ~_ACTIVE_MASK
+        self._write_register(_CTRL_REG1, ctrl)
+
+        if scale_range is not None or high_pass_filter is not None:
+            cfg = self._read_register(_XYZ_DATA_CFG)
+            if scale_range is not None:
+                cfg = (cfg & ~_SCALE_RANGE_MASK) | scale_range
+            if high_pass_filter is not None:
+                cfg = (cfg & ~_HPF_MASK) | (high_pass_filter << 4)
+            self._write_register(_XYZ_DATA_CFG, cfg)
+
+        if high_pass_filter_cutoff is not None:
+            self._update_register(
+                _HP_FILTER_CUTOFF, _HPF_CUTOFF_MASK, high_pass_filter_cutoff
+            )
+
+        # The data rate can only change in standby, so it goes in with the
+        # write that makes the sensor active again
+        if data_rate is not None:
+            ctrl = (ctrl & ~_DATA_RATE_MASK) | (data_rate << 3)
+        self._write_register(_CTRL_REG1, ctrl | ACTIVE_MODE)
+
+        if scale_range is not None:
+            self._cache_scale_range(scale_range)
+        if data_rate is not None:
+            self._data_rate_cached = data_rate
+        if high_pass_filter is not None:
+            self._high_pass_filter_cached = high_pass_filter
+        if high_pass_filter_cutoff is not None:
+            self._high_pass_filter_cutoff_cached = high_pass_filter_cutoff
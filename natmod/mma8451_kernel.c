@@ -0,0 +1,44 @@
+// SPDX-FileCopyrightText: Copyright (c) 2023 Jose D. Montoya
+//
+// SPDX-License-Identifier: MIT
+
+// Native version of the MMA8451 sample scaling kernel. Same behaviour as the
+// viper fallback in micropython_mma8451/mma8451.py.
+
+#include "py/dynruntime.h"
+
+// scale_q16(buf, factor, out)
+//
+// buf holds the six big-endian bytes read from OUT_X_MSB, factor is the
+// m/s^2 per count in Q8.24 and out receives the three Q16.16 m/s^2 results
+// as 32-bit integers.
+static mp_obj_t scale_q16(mp_obj_t buf_obj, mp_obj_t factor_obj, mp_obj_t out_obj) {
+    mp_buffer_info_t buf;
+    mp_buffer_info_t out;
+    mp_get_buffer_raise(buf_obj, &buf, MP_BUFFER_READ);
+    mp_get_buffer_raise(out_obj, &out, MP_BUFFER_WRITE);
+    if (buf.len < 6 || out.len < 3 * sizeof(int32_t)) {
+        mp_raise_ValueError(MP_ERROR_TEXT("buffer too small"));
+    }
+
+    const uint8_t *data = buf.buf;
+    int32_t *result = out.buf;
+    int32_t factor = mp_obj_get_int(factor_obj);
+
+    for (size_t i = 0; i < 3; i++) {
+        // 14-bit left aligned samples
+        int32_t count = (int16_t)((data[2 * i] << 8) | data[2 * i + 1]) >> 2;
+        result[i] = (count * factor) >> 8;
+    }
+
+    return mp_const_none;
+}
+static MP_DEFINE_CONST_FUN_OBJ_3(scale_q16_obj, scale_q16);
+
+mp_obj_t mpy_init(mp_obj_fun_bc_t *self, size_t n_args, size_t n_kw, mp_obj_t *args) {
+    MP_DYNRUNTIME_INIT_ENTRY
+
+    mp_store_global(MP_QSTR_scale_q16, MP_OBJ_FROM_PTR(&scale_q16_obj));
+
+    MP_DYNRUNTIME_INIT_EXIT
+}